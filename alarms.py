@@ -1,14 +1,26 @@
 import network
 import ntptime
-from machine import RTC
+import micropython
+from machine import RTC, Timer
 import time
 
+# Built once at import so firing an alarm allocates nothing
+_ALARM_MSG = "Alarm ringing!"
+
 class AlarmClock:
     def __init__(self, ssid, password):
         self.ssid = ssid
         self.password = password
         self.rtc = RTC()
-        self.alarms = []
+        # One bit per minute of the day (1440 bits / 180 bytes): checking
+        # an alarm is a byte load and a mask, with no tuple hashing
+        self.alarm_bits = bytearray(180)
+        # Bound method cached once; check_alarms runs forever
+        self._now = self.rtc.datetime
+        self._timer = None
+        # Preallocated ref so the ISR passes it to micropython.schedule
+        # without allocating
+        self._check_ref = self._on_timer
 
     def connect_wifi(self):
         station = network.WLAN(network.STA_IF)
@@ -23,17 +35,73 @@ class AlarmClock:
         print("Time synchronized with NTP server.")
     
     def set_alarm(self, hour, minute):
-        alarm_time = (hour, minute)
-        self.alarms.append(alarm_time)
+        idx = hour * 60 + minute
+        self.alarm_bits[idx >> 3] |= 1 << (idx & 7)
         print(f"Alarm set for {hour:02}:{minute:02}.")
+
+    def clear_alarm(self, hour, minute):
+        idx = hour * 60 + minute
+        self.alarm_bits[idx >> 3] &= ~(1 << (idx & 7))
+
+    def save_alarms(self, filename='alarm_bits.bin'):
+        # 180 raw bytes, no JSON encode/decode round-trip
+        with open(filename, 'wb') as f:
+            f.write(self.alarm_bits)
+
+    def load_alarms(self, filename='alarm_bits.bin'):
+        try:
+            with open(filename, 'rb') as f:
+                data = f.read(180)
+            # Only adopt a complete image: slice assignment replaces the
+            # buffer rather than overwriting it, so a short read (e.g. a
+            # reset mid-save) would shrink the bitset and later bit
+            # tests would raise IndexError inside the timer callback
+            if len(data) == len(self.alarm_bits):
+                self.alarm_bits[:] = data
+        except OSError:
+            pass  # no saved alarms yet
     
+    def start(self):
+        # Arm a one-shot hardware timer for the next alarm; the CPU is
+        # fully idle in between instead of sleeping in a Python loop
+        self._timer = Timer(0)
+        self._arm()
+
+    def _arm(self):
+        delay = self.next_alarm_delay()
+        # Re-check once a minute when no alarms are set so newly added
+        # ones get picked up
+        period = 60000 if delay is None else max(1, delay) * 1000
+        self._timer.init(period=period, mode=Timer.ONE_SHOT,
+                         callback=self._isr)
+
+    def _isr(self, t):
+        # Timer callbacks run in IRQ context; defer the real work
+        micropython.schedule(self._check_ref, None)
+
+    def _on_timer(self, _):
+        self.check_alarms()
+        self._arm()
+
+    def next_alarm_delay(self):
+        # Seconds until the next alarm, or None if no alarms are set.
+        # Scans at most one day of minutes, wrapping past midnight; only
+        # runs when (re)arming the timer, never per check.
+        now = self._now()
+        now_minute = now[4] * 60 + now[5]
+        bits = self.alarm_bits
+        for off in range(1, 1441):
+            idx = (now_minute + off) % 1440
+            if bits[idx >> 3] & (1 << (idx & 7)):
+                return off * 60 - now[6]
+        return None
+
     def check_alarms(self):
-        current_time = self.rtc.datetime()
-        current_hour = current_time[4]
-        current_minute = current_time[5]
-        
-        if (current_hour, current_minute) in self.alarms:
-            print("Alarm ringing!")
+        current_time = self._now()
+        idx = current_time[4] * 60 + current_time[5]
+
+        if self.alarm_bits[idx >> 3] & (1 << (idx & 7)):
+            print(_ALARM_MSG)
             # Here you could add code to sound a buzzer or turn on an LED
 
 if __name__ == "__main__":
@@ -47,6 +115,7 @@ if __name__ == "__main__":
     # Example: Set an alarm for 10:30
     alarm_clock.set_alarm(10, 30)
     
+    # The hardware timer drives alarm checks from here on
+    alarm_clock.start()
     while True:
-        alarm_clock.check_alarms()
         time.sleep(60)
\ No newline at end of file
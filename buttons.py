@@ -1,5 +1,6 @@
 import asyncio
 import machine
+import time
 
 # Define buttons
 buttons = {
@@ -7,18 +8,53 @@ buttons = {
     'button2': machine.Pin(1, machine.Pin.IN, machine.Pin.PULL_UP),
 }
 
-async def handle_button(button_name):
+DEBOUNCE_MS = 50
+QUEUE_SIZE = 8
+
+# Fixed-size ring buffer filled from the ISR; preallocated so the
+# interrupt handler never allocates
+_queue = [None] * QUEUE_SIZE
+_head = 0
+_tail = 0
+_last_ms = {pin: -DEBOUNCE_MS for pin in buttons.values()}
+_names = {pin: name for name, pin in buttons.items()}
+_flag = asyncio.ThreadSafeFlag()
+
+
+def _isr(pin):
+    # Debounce is a timestamp compare; events land in the ring buffer
+    # and the pump coroutine is woken via the thread-safe flag
+    global _head
+    now = time.ticks_ms()
+    if time.ticks_diff(now, _last_ms[pin]) < DEBOUNCE_MS:
+        return
+    _last_ms[pin] = now
+    nxt = (_head + 1) % QUEUE_SIZE
+    if nxt != _tail:  # drop presses if the queue is full
+        _queue[_head] = pin
+        _head = nxt
+        _flag.set()
+
+
+def init():
+    for pin in buttons.values():
+        pin.irq(trigger=machine.Pin.IRQ_FALLING, handler=_isr)
+
+
+async def pump():
+    global _tail
     while True:
-        if not buttons[button_name].value():  # If button is pressed
-            print(f'{button_name} pressed')
-            await asyncio.sleep(0.2)  # debounce delay
-        await asyncio.sleep(0.01)  # Short delay to avoid busy-waiting
+        await _flag.wait()
+        while _tail != _head:
+            pin = _queue[_tail]
+            _tail = (_tail + 1) % QUEUE_SIZE
+            print(f'{_names[pin]} pressed')
+
 
 async def main():
-    await asyncio.gather(
-        handle_button('button1'),
-        handle_button('button2'),
-    )
+    init()
+    await pump()
+
 
 if __name__ == '__main__':
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
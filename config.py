@@ -1,20 +1,29 @@
+try:
+    from micropython import const
+except ImportError:
+    # CPython: const() is just an identity marker
+    def const(x):
+        return x
+
 SSID = 'your_wifi_ssid'
 PASSWORD = 'your_wifi_password'
 NTP_SERVER = 'pool.ntp.org'
-RETRY_ATTEMPTS = 3
-INTERVAL = 5
-LED_PIN = 25
-LED_COUNT = 60
-LED_BRIGHTNESS_MAX = 255
+RETRY_ATTEMPTS = const(3)
+WIFI_CONNECT_TIMEOUT = const(90)  # seconds
+NTP_RESYNC_INTERVAL = const(21600)  # seconds; well under the ~6 day ticks wrap
+INTERVAL = const(5)
+LED_PIN = const(25)
+LED_COUNT = const(60)
+LED_BRIGHTNESS_MAX = const(255)
 WARM_WHITE_RGB = (255, 200, 150)
 COLD_WHITE_RGB = (255, 255, 255)
-ALARM_CHECK_INTERVAL = 1  # seconds
-DEFAULT_RAMP_DURATION = 30  # minutes
-DEFAULT_MAX_BRIGHTNESS = 80
-ERROR_BLINK_INTERVAL = 500  # ms
+ALARM_CHECK_INTERVAL = const(1)  # seconds
+DEFAULT_RAMP_DURATION = const(30)  # minutes
+DEFAULT_MAX_BRIGHTNESS = const(80)
+ERROR_BLINK_INTERVAL = const(500)  # ms
 ALARMS_FILE = 'alarms.json'
 SETTINGS_FILE = 'settings.json'
-WEB_SERVER_PORT = 80
+WEB_SERVER_PORT = const(80)
 WEB_SERVER_HOST = '0.0.0.0'
 TIMEZONE_OFFSET = '+1'
-DAYLIGHT_SAVING_OFFSET = 1
\ No newline at end of file
+DAYLIGHT_SAVING_OFFSET = const(1)
@@ -11,55 +11,309 @@ except ImportError:
         def fill(self, color):
             pass
 
+        def write(self):
+            pass
+
+import time
+from config import WARM_WHITE_RGB, COLD_WHITE_RGB
+from array import array
+
+try:
+    import esp32
+except ImportError:
+    esp32 = None
+
+# WS2812 bit timings in 100 ns RMT ticks (80 MHz / clock_div=8)
+_T0H, _T0L = 4, 8
+_T1H, _T1L = 8, 4
+
+try:
+    import micropython
+
+    # Viper compiles this to native int-typed machine code: no boxing, no
+    # bytecode dispatch per byte, which matters for per-LED fills that
+    # cannot go through the C-level NeoPixel.fill (e.g. gradients).
+    @micropython.viper
+    def _fill_grb(buf: ptr8, n: int, r: int, g: int, b: int):  # noqa: F821
+        i = 0
+        while i < n:
+            buf[3 * i] = g
+            buf[3 * i + 1] = r
+            buf[3 * i + 2] = b
+            i += 1
+
+    # Packed variant: the 0xRRGGBB int is unpacked once, in native code,
+    # so callers never build an (r, g, b) tuple at all
+    @micropython.viper
+    def _fill_grb_packed(buf: ptr8, n: int, color: int):  # noqa: F821
+        r = (color >> 16) & 0xFF
+        g = (color >> 8) & 0xFF
+        b = color & 0xFF
+        i = 0
+        while i < n:
+            buf[3 * i] = g
+            buf[3 * i + 1] = r
+            buf[3 * i + 2] = b
+            i += 1
+
+    # Fused kernel: read the final RGB straight out of the flat LUT and
+    # fill the pixel buffer in the same native pass, so a CCT+brightness
+    # update never materializes an intermediate color value in Python
+    @micropython.viper
+    def _fill_lut(buf: ptr8, n: int, lut: ptr8, off: int):  # noqa: F821
+        r = lut[off]
+        g = lut[off + 1]
+        b = lut[off + 2]
+        i = 0
+        while i < n:
+            buf[3 * i] = g
+            buf[3 * i + 1] = r
+            buf[3 * i + 2] = b
+            i += 1
+
+    # RMT pulse expansion: n pixel bytes become 16*n (high, low) tick
+    # pairs. In bytecode this is ~2880 inner iterations per frame on a
+    # 60-LED strip, slower than the bit-bang it replaces; in viper it
+    # is native shifts and ptr16 stores. Timings are _T0H/_T0L/_T1H/
+    # _T1L inlined — viper can't read module globals unboxed.
+    @micropython.viper
+    def _expand_pulses(pulses: ptr16, buf: ptr8, n: int):  # noqa: F821
+        i = 0
+        j = 0
+        while i < n:
+            byte = buf[i]
+            shift = 7
+            while shift >= 0:
+                if (byte >> shift) & 1:
+                    pulses[j] = 8
+                    pulses[j + 1] = 4
+                else:
+                    pulses[j] = 4
+                    pulses[j + 1] = 8
+                j += 2
+                shift -= 1
+            i += 1
+except (ImportError, NameError):
+    # Port without viper (or plain CPython): bytecode fallback
+    def _fill_grb(buf, n, r, g, b):
+        for i in range(n):
+            off = 3 * i
+            buf[off] = g
+            buf[off + 1] = r
+            buf[off + 2] = b
+
+    def _fill_grb_packed(buf, n, color):
+        _fill_grb(buf, n, (color >> 16) & 0xFF, (color >> 8) & 0xFF,
+                  color & 0xFF)
+
+    def _fill_lut(buf, n, lut, off):
+        _fill_grb(buf, n, lut[off], lut[off + 1], lut[off + 2])
+
+    # Without viper, expand via a 256-entry byte -> 16-pulse table built
+    # once: one slice copy per byte instead of eight shift/mask
+    # iterations of bytecode
+    _PULSE_TABLE = []
+    for _byte in range(256):
+        _pat = array('H', (0 for _ in range(16)))
+        for _bit in range(8):
+            if (_byte >> (7 - _bit)) & 1:
+                _pat[2 * _bit] = _T1H
+                _pat[2 * _bit + 1] = _T1L
+            else:
+                _pat[2 * _bit] = _T0H
+                _pat[2 * _bit + 1] = _T0L
+        _PULSE_TABLE.append(_pat)
+
+    def _expand_pulses(pulses, buf, n):
+        table = _PULSE_TABLE
+        j = 0
+        for byte in buf:
+            pulses[j:j + 16] = table[byte]
+            j += 16
+
+
+def _pack_rgb(r, g, b):
+    return (r << 16) | (g << 8) | b
+
+
+# Color temperature lookup table, built once at import. Temperature is an
+# integer 0-100, so interpolating warm->cold white per call just repeats the
+# same float math every frame; index the precomputed array instead. Entries
+# are packed 0xRRGGBB ints (one small int vs a 3-tuple of boxed ints).
+_WARM = WARM_WHITE_RGB
+_COLD = COLD_WHITE_RGB
+CCT_LUT = array('I', (
+    _pack_rgb(
+        int(_WARM[0] + (_COLD[0] - _WARM[0]) * t / 100),
+        int(_WARM[1] + (_COLD[1] - _WARM[1]) * t / 100),
+        int(_WARM[2] + (_COLD[2] - _WARM[2]) * t / 100),
+    )
+    for t in range(101)
+))
+
+
+def _cct_to_rgb(temperature):
+    # Cold path only: unpack to a tuple on demand
+    c = CCT_LUT[int(temperature)]
+    return ((c >> 16) & 0xFF, (c >> 8) & 0xFF, c & 0xFF)
+
+
+# Fused CCT x brightness table: 101 temperatures x 101 brightness levels,
+# 3 bytes per entry (~30 KB flat bytearray). Gamma 2.5 is applied once here,
+# which makes dimming perceptually linear and turns a color update into a
+# single offset lookup with no per-frame float math or tuple allocation.
+RGB_LUT = bytearray(101 * 101 * 3)
+_off = 0
+for _t in range(101):
+    _r, _g, _b = _cct_to_rgb(_t)
+    for _lvl in range(101):
+        _factor = (_lvl / 100) ** 2.5
+        RGB_LUT[_off] = int(_r * _factor)
+        RGB_LUT[_off + 1] = int(_g * _factor)
+        RGB_LUT[_off + 2] = int(_b * _factor)
+        _off += 3
+
+
+class RMTNeoPixel:
+    # NeoPixel-compatible strip driven by the ESP32 RMT peripheral.
+    # write() queues the waveform via DMA and returns immediately instead
+    # of bit-banging ~30 us per LED with interrupts disabled, so asyncio,
+    # NTP and the sockets keep running during transmission.
+
+    def __init__(self, pin, n):
+        self.n = n
+        self.buf = bytearray(3 * n)
+        self._rmt = esp32.RMT(0, pin=pin, clock_div=8)
+        # 24 bits per LED, one (high, low) pulse pair per bit
+        self._pulses = array('H', (0 for _ in range(48 * n)))
+
+    def fill(self, color):
+        r, g, b = color
+        _fill_grb(self.buf, self.n, r, g, b)
+
+    def write(self):
+        # Expansion runs in the native/viper kernel (or the table-based
+        # fallback); only then does the RMT queue the waveform via DMA
+        _expand_pulses(self._pulses, self.buf, 3 * self.n)
+        self._rmt.write_pulses(self._pulses, 1)
+
+
 class LEDController:
     def __init__(self, pin, num_leds):
-        self.leds = NeoPixel(pin, num_leds)
+        if esp32 is not None:
+            self.leds = RMTNeoPixel(pin, num_leds)
+        else:
+            self.leds = NeoPixel(pin, num_leds)
+        self.num_leds = num_leds
+        # Cache the raw pixel buffer once so hot paths skip the attribute lookup
+        self._buf = getattr(self.leds, 'buf', None)
+        self.current_color = 0  # packed 0xRRGGBB
+        # Double buffer: frames are rendered into the shadow first and
+        # only copied + written out when the bytes actually changed, so
+        # ramp plateaus at a quantized brightness cost zero bus traffic
+        self._shadow = bytearray(3 * num_leds)
+        self._dirty = False
+        self._flushing = False
+        # Error-blink frames never change; prebuild both GRB buffers once
+        # so a blink cycle is two buffer copies instead of Python fills
+        self._red_buf = bytes((0, 255, 0)) * num_leds
+        self._off_buf = bytes(3 * num_leds)
+        # Probe the strip once here instead of guarding every frame's
+        # write() with try/except inside the hot loops; per-frame
+        # exception handlers cost bytecode and block invariant hoisting
+        try:
+            self.leds.write()
+            self.fallback_mode = False
+        except Exception:
+            self.fallback_mode = True
 
-    async def ramp_brightness(self, target_brightness, duration):
+    def _ramp_plan(self, target_brightness, duration):
+        # Shared by the async and sync ramps so neither duplicates the
+        # stepping math (and the sync path never touches the event loop)
         current_brightness = self.leds.brightness
-        step = (target_brightness - current_brightness) / (duration * 1000 / 10)
+        steps = abs(target_brightness - current_brightness)
+        if steps == 0:
+            return None
+        direction = 1 if target_brightness > current_brightness else -1
+        return current_brightness, duration / steps, direction
+
+    async def ramp_brightness(self, target_brightness, duration):
+        # Step once per integer brightness transition instead of once per
+        # 10 ms tick: a long ramp costs |target - current| strip writes,
+        # not duration/0.01 redundant ones
+        plan = self._ramp_plan(target_brightness, duration)
+        if plan is None:
+            return
+        current_brightness, step_delay, direction = plan
+        # The asyncio tick is ~10 ms on MicroPython; sub-tick sleeps
+        # either busy-wait or over-sleep, so batch them up and yield once
+        # the accumulated delay is worth a scheduler round-trip
+        # Locals are one bytecode to load; self.x / module.x are dict
+        # lookups on MicroPython, so bind the hot names once
+        set_brightness = self.set_brightness
+        sleep = asyncio.sleep
+        acc = 0.0
         while current_brightness != target_brightness:
-            current_brightness += step
-            self.set_brightness(int(current_brightness))
-            await asyncio.sleep(0.01)
+            current_brightness += direction
+            set_brightness(current_brightness)
+            acc += step_delay
+            if acc >= 0.02:
+                await sleep(acc)
+                acc = 0.0
 
     async def set_color_temperature(self, cct, duration):
-        warm_white = (255, 200, 150)
-        cold_white = (255, 255, 255)
-        r = warm_white[0] + (cold_white[0] - warm_white[0]) * (cct / 100)
-        g = warm_white[1] + (cold_white[1] - warm_white[1]) * (cct / 100)
-        b = warm_white[2] + (cold_white[2] - warm_white[2]) * (cct / 100)
-        self.set_color((int(r), int(g), int(b)))
+        self.set_cct_brightness(cct, 100)
+
+    def set_cct_brightness(self, cct, brightness):
+        off = 3 * (int(cct) * 101 + int(brightness))
+        packed = (RGB_LUT[off] << 16) | (RGB_LUT[off + 1] << 8) | RGB_LUT[off + 2]
+        if self._buf is None:
+            self.set_color_packed(packed)
+            return
+        self.current_color = packed
+        _fill_lut(self._shadow, self.num_leds, RGB_LUT, off)
+        self._push()
 
     async def pulse_effect(self, intensity, duration):
+        set_brightness = self.set_brightness
+        sleep = asyncio.sleep
         for _ in range(int(duration * 2)):
-            self.set_brightness(intensity)
-            await asyncio.sleep(0.5)
-            self.set_brightness(0)
-            await asyncio.sleep(0.5)
+            set_brightness(intensity)
+            await sleep(0.5)
+            set_brightness(0)
+            await sleep(0.5)
 
     async def error_blinking(self, times, duration):
         for _ in range(times):
-            self.set_color((255, 0, 0))  # Red for error
+            self._show_frame(self._red_buf, (255, 0, 0))  # Red for error
             await asyncio.sleep(duration)  # Blink duration
-            self.set_color((0, 0, 0))
+            self._show_frame(self._off_buf, (0, 0, 0))
             await asyncio.sleep(duration)
 
+    def _show_frame(self, frame, color):
+        # Copy a prebuilt GRB frame into the pixel buffer (a memcpy under
+        # the hood) when the port exposes it
+        if self._buf is not None:
+            self._shadow[:] = frame
+            self._push()
+        else:
+            self.set_color(color)
+
     def sync_set_brightness(self, target_brightness, duration):
-        current_brightness = self.leds.brightness
-        step = (target_brightness - current_brightness) / (duration * 1000 / 10)
+        # Same delta-triggered stepping as ramp_brightness, blocking
+        plan = self._ramp_plan(target_brightness, duration)
+        if plan is None:
+            return
+        current_brightness, step_delay, direction = plan
+        set_brightness = self.set_brightness
+        sleep = time.sleep
         while current_brightness != target_brightness:
-            current_brightness += step
-            self.set_brightness(int(current_brightness))
-            time.sleep(0.01)
+            current_brightness += direction
+            set_brightness(current_brightness)
+            sleep(step_delay)
 
     def sync_set_color_temperature(self, cct, duration):
-        warm_white = (255, 200, 150)
-        cold_white = (255, 255, 255)
-        r = warm_white[0] + (cold_white[0] - warm_white[0]) * (cct / 100)
-        g = warm_white[1] + (cold_white[1] - warm_white[1]) * (cct / 100)
-        b = warm_white[2] + (cold_white[2] - warm_white[2]) * (cct / 100)
-        self.set_color((int(r), int(g), int(b)))
+        self.set_cct_brightness(cct, 100)
 
     def set_brightness(self, brightness):
         # Set the brightness for all LEDs
@@ -67,6 +321,49 @@ class LEDController:
         self.leds.write()
 
     def set_color(self, color):
-        # Set color for all LEDs
-        self.leds.fill(color)
-        self.leds.write()
\ No newline at end of file
+        # Set color for all LEDs, writing the raw GRB buffer directly
+        # when the port exposes it
+        r, g, b = color
+        self.current_color = _pack_rgb(r, g, b)
+        if self._buf is not None:
+            _fill_grb(self._shadow, self.num_leds, r, g, b)
+            self._push()
+        else:
+            self.leds.fill(color)
+            self.leds.write()
+
+    def set_color_packed(self, color):
+        # Hot-path variant taking a packed 0xRRGGBB int: no tuple is
+        # created; the viper helper unpacks the channels in native code
+        self.current_color = color
+        if self._buf is not None:
+            _fill_grb_packed(self._shadow, self.num_leds, color)
+            self._push()
+        else:
+            self.leds.fill(((color >> 16) & 0xFF, (color >> 8) & 0xFF,
+                            color & 0xFF))
+            self.leds.write()
+
+    def _push(self):
+        # Skip the strip write entirely when the rendered frame is
+        # byte-identical to what the hardware already shows
+        if self._shadow == self._buf:
+            return
+        self._buf[:] = self._shadow
+        self._dirty = True
+        if not self._flushing:
+            self.leds.write()
+            self._dirty = False
+
+    async def flush_loop(self, interval=0.02):
+        # Optional coalescing: while this runs, bursts of updates within
+        # one interval collapse into a single strip write
+        self._flushing = True
+        try:
+            while True:
+                if self._dirty:
+                    self.leds.write()
+                    self._dirty = False
+                await asyncio.sleep(interval)
+        finally:
+            self._flushing = False
\ No newline at end of file
@@ -2,57 +2,193 @@ import asyncio
 import machine
 import network
 import ntptime
+import random
+import socket
 import time
 
-# Configuration Variables
-SSID = 'your_wifi_ssid'
-PASSWORD = 'your_wifi_password'
-ALARM_HOUR = 7
-ALARM_MINUTE = 0
-LED_PIN = 2
-
-# Initialize LED
-led = machine.Pin(LED_PIN, machine.Pin.OUT)
-
-# Connect to Wi-Fi
-async def connect_to_wifi():
-    wlan = network.WLAN(network.STA_IF)
-    wlan.active(True)
-    wlan.connect(SSID, PASSWORD)
-    while not wlan.isconnected():
-        await asyncio.sleep(1)
-    print('Connected to Wi-Fi:', wlan.ifconfig())
-
-# Synchronize time with NTP server
-async def sync_time():
-    ntptime.settime()
-    print('Time synchronized')
-
-# Alarm checking logic
-async def check_alarm():
-    while True:
-        current_time = time.localtime()
-        if current_time[3] == ALARM_HOUR and current_time[4] == ALARM_MINUTE:
-            led.on()  # Turn on LED
+import config
+from storage import Storage
+from web_server import AsyncHTTPServer
+
+
+class AlarmClockApp:
+    def __init__(self):
+        self.storage = Storage()
+        self.web_server = AsyncHTTPServer()
+        self.web_server.set_app(self)
+        self.storage.on_alarm_deleted = (
+            lambda alarm_id: self.triggered_alarms.pop(alarm_id, None))
+        self.led = machine.Pin(config.LED_PIN, machine.Pin.OUT)
+        # alarm_id -> ymd int of the day it last fired; pruned daily so
+        # it stays bounded and a reused id can fire again tomorrow
+        self.triggered_alarms = {}
+        self.alarm_tasks = set()
+        # NTP anchor: wallclock = _epoch_base + elapsed ticks. Lets the
+        # minute loop derive the time arithmetically instead of reading
+        # the RTC every wakeup.
+        self._epoch_base = None
+        self._ticks_base = 0
+        # NTP server IP cached after the first DNS resolve; DNS lookups
+        # block the whole loop on ESP32
+        self._ntp_ip = None
+
+    # Connect to Wi-Fi
+    async def connect_to_wifi(self):
+        wlan = network.WLAN(network.STA_IF)
+        wlan.active(True)
+        wlan.connect(config.SSID, config.PASSWORD)
+        # Exponential backoff with jitter: fast connects are noticed
+        # within 250 ms, slow APs get a patient 2 s ceiling, and the
+        # jitter avoids herds of synchronized polls on shared APs
+        isconnected = wlan.isconnected
+        delay = 0.25
+        elapsed = 0.0
+        while not isconnected():
+            if elapsed >= config.WIFI_CONNECT_TIMEOUT:
+                print('WiFi connect timed out')
+                return False
+            jitter = random.getrandbits(4) * 0.00625  # 0-94 ms
+            await asyncio.sleep(delay + jitter)
+            elapsed += delay + jitter
+            delay = min(delay * 1.5, 2.0)
+        print('Connected to Wi-Fi:', wlan.ifconfig())
+        return True
+
+    def _resolve_ntp(self):
+        if self._ntp_ip is None:
+            self._ntp_ip = socket.getaddrinfo(
+                config.NTP_SERVER, 123)[0][-1][0]
+        return self._ntp_ip
+
+    # Synchronize time with NTP server
+    async def sync_time_ntp(self):
+        for attempt in range(config.RETRY_ATTEMPTS):
+            try:
+                ntptime.host = self._resolve_ntp()
+                ntptime.settime()
+                # Re-anchor the ticks_ms-based clock on every resync
+                self._epoch_base = time.time()
+                self._ticks_base = time.ticks_ms()
+                print('Time synchronized')
+                return True
+            except OSError as e:
+                # Drop the cached IP so the next attempt re-resolves
+                self._ntp_ip = None
+                print('NTP sync failed:', e)
+                # No sleep on the last attempt: surface the failure
+                # immediately instead of adding INTERVAL dead seconds
+                if attempt < config.RETRY_ATTEMPTS - 1:
+                    await asyncio.sleep(config.INTERVAL)
+        return False
+
+    def _reanchor(self):
+        # Roll the anchor forward from the derived clock itself.
+        # ticks_diff is only valid while the true delta stays under half
+        # the ticks period (~6.2 days on ESP32); advancing both bases
+        # keeps the arithmetic clock correct even when NTP is down.
+        if self._epoch_base is None:
+            return
+        elapsed = time.ticks_diff(time.ticks_ms(), self._ticks_base) // 1000
+        self._epoch_base += elapsed
+        self._ticks_base = time.ticks_add(self._ticks_base, elapsed * 1000)
+
+    async def resync_time(self):
+        # Without this, sync_time_ntp only ever ran at startup and the
+        # ticks-anchored clock would wrap after ~6 days of uptime
+        while True:
+            await asyncio.sleep(config.NTP_RESYNC_INTERVAL)
+            if not await self.sync_time_ntp():
+                self._reanchor()
+
+    def _get_current_time(self):
+        # Pure arithmetic from the NTP anchor when available; only falls
+        # back to an RTC-backed localtime() before the first sync
+        if self._epoch_base is None:
+            return time.localtime()
+        elapsed = time.ticks_diff(time.ticks_ms(), self._ticks_base) // 1000
+        return time.localtime(self._epoch_base + elapsed)
+
+    def _should_trigger_alarm(self, alarm, now, today):
+        # alarm is a storage._Alarm: straight attribute reads, no dict
+        # hashing; the fields were derived once at load/mutation time
+        if not alarm.enabled:
+            return False
+        if now[3] != alarm.h or now[4] != alarm.m:
+            return False
+        if not (alarm.days_mask >> now[6]) & 1:
+            return False
+        if self.triggered_alarms.get(alarm.id) == today:
+            return False
+        return True
+
+    async def _trigger_alarm(self, alarm):
+        # Single top-level handler; a second wrapper coroutine would just
+        # cost one more frame and Task allocation per firing
+        try:
+            print('Alarm ringing:', alarm.data['time'])
+            self.led.on()
             await asyncio.sleep(60)  # Alarm lasts for 60 seconds
-            led.off()  # Turn off LED
-        await asyncio.sleep(30)  # Check every 30 seconds
-
-# Storage management (simulated)
-async def storage_management():
-    # Placeholder for actual storage management code
-    while True:
-        print('Storage management routine running')
-        await asyncio.sleep(600)  # Run every 10 minutes
-
-# Main function to run coroutines
-async def main():
-    await connect_to_wifi()
-    await sync_time()
-    await asyncio.gather(check_alarm(), storage_management())
+            self.led.off()
+        except Exception as e:
+            print('Alarm', alarm.id, 'failed:', e)
+
+    # Alarm checking logic
+    async def check_alarms(self):
+        self.storage.load_alarms()  # prime cache and index
+        last_ymd = 0
+        while True:
+            now = self._get_current_time()
+            today = now[0] * 10000 + now[1] * 100 + now[2]
+            if today != last_ymd:
+                last_ymd = today
+                # Drop suppressions from previous days
+                for alarm_id in [a for a, ymd in
+                                 self.triggered_alarms.items() if ymd < today]:
+                    del self.triggered_alarms[alarm_id]
+            # O(1) lookup in the precomputed (hour, minute, weekday) index
+            matches = []
+            for alarm in self.storage.alarms_for(now[3], now[4], now[6]):
+                if self._should_trigger_alarm(alarm, now, today):
+                    self.triggered_alarms[alarm.id] = today
+                    matches.append(alarm)
+            if matches:
+                # One task per tick: alarms firing the same minute start
+                # together under a single gather instead of being
+                # scheduled one event-loop trip apart
+                task = asyncio.create_task(asyncio.gather(
+                    *[self._trigger_alarm(a) for a in matches]))
+                # The task removes itself on completion: no list rebuild
+                # per minute just to shed finished tasks
+                self.alarm_tasks.add(task)
+                task.add_done_callback(self.alarm_tasks.discard)
+            # Alarms are minute-granular: sleep until just past the next
+            # minute boundary instead of polling every second. The guard
+            # minute compare is gone since we wake exactly once per minute.
+            try:
+                await asyncio.sleep(60 - self._get_current_time()[5] + 0.05)
+            except Exception:
+                await asyncio.sleep(config.ALARM_CHECK_INTERVAL)
+
+    # Storage management (simulated)
+    async def storage_management(self):
+        # Placeholder for actual storage management code
+        while True:
+            print('Storage management routine running')
+            await asyncio.sleep(600)  # Run every 10 minutes
+
+    # Main function to run coroutines
+    async def main(self):
+        await self.connect_to_wifi()
+        await self.sync_time_ntp()
+        await asyncio.gather(self.check_alarms(), self.storage_management(),
+                             self.storage.flush_loop(),
+                             self.web_server.start(),
+                             self.resync_time())
+
 
 # Start the application
-try:
-    asyncio.run(main())
-except KeyboardInterrupt:
-    print('Program stopped')
+if __name__ == '__main__':
+    try:
+        asyncio.run(AlarmClockApp().main())
+    except KeyboardInterrupt:
+        print('Program stopped')
@@ -0,0 +1,6 @@
+# MicroPython frozen-module manifest. Build the firmware with
+#   make FROZEN_MANIFEST=/path/to/manifest.py
+# so config.py is compiled into the image and its const() values are
+# inlined by mpy-cross instead of being looked up at runtime.
+include("$(PORT_DIR)/boards/manifest.py")
+freeze(".", "config.py")
@@ -2,35 +2,51 @@ import asyncio
 import neopixel
 import machine
 
+WARM_WHITE = (255, 224, 204)
+COLD_WHITE = (255, 255, 255)
+
 class NeoPixelControl:
     def __init__(self, pin, num_pixels):
         self.pixel_pin = machine.Pin(pin)
         self.num_pixels = num_pixels
         self.pixels = neopixel.NeoPixel(self.pixel_pin, self.num_pixels)
+        self._buf = getattr(self.pixels, 'buf', None)
+        # Per-channel brightness tables: table[b] == (channel * b) >> 8.
+        # Integer shift instead of a float divide per call; built once.
+        self._warm = tuple(bytes((ch * b) >> 8 for b in range(256))
+                           for ch in WARM_WHITE)
+        self._cold = tuple(bytes((ch * b) >> 8 for b in range(256))
+                           for ch in COLD_WHITE)
 
     async def set_color(self, r, g, b):
-        for i in range(self.num_pixels):
-            self.pixels[i] = (r, g, b)
+        # Bulk-assign the raw buffer (GRB order) in one slice copy;
+        # fill() loops per pixel in Python on some ports. Fall back to
+        # fill() when the driver hides its buffer.
+        if self._buf is not None:
+            self._buf[:] = bytes((g, r, b)) * self.num_pixels
+        else:
+            self.pixels.fill((r, g, b))
         self.pixels.write()
 
+    def _lookup(self, tables, brightness):
+        r, g, b = tables
+        return (r[brightness], g[brightness], b[brightness])
+
     async def set_warm_white(self, brightness=255):
-        r = int(255 * (brightness / 255))
-        g = int(224 * (brightness / 255))
-        b = int(204 * (brightness / 255))
-        await self.set_color(r, g, b)
+        await self.set_color(*self._lookup(self._warm, brightness))
 
     async def set_cold_white(self, brightness=255):
-        r = int(255 * (brightness / 255))
-        g = int(255 * (brightness / 255))
-        b = int(255 * (brightness / 255))
-        await self.set_color(r, g, b)
+        await self.set_color(*self._lookup(self._cold, brightness))
 
-    async def cycle_colors(self):
+    async def cycle_colors(self, brightness=255):
+        # Brightness is constant for the whole effect, so apply it to the
+        # palette once up front rather than rescaling every cycle
+        palette = (self._lookup(self._warm, brightness),
+                   self._lookup(self._cold, brightness))
         while True:
-            await self.set_warm_white()
-            await asyncio.sleep(1)
-            await self.set_cold_white()
-            await asyncio.sleep(1)
+            for color in palette:
+                await self.set_color(*color)
+                await asyncio.sleep(1)
 
 # Example usage:
 # async def main():
@@ -1,11 +1,54 @@
+import asyncio
 import json
 import os
 
+import config
+
+class _Alarm:
+    # Hot-path view of an alarm dict: the per-minute check reads plain
+    # attributes instead of hashing five dict keys per alarm. The dict
+    # stays authoritative for serialization via .data.
+    __slots__ = ('id', 'h', 'm', 'enabled', 'days_mask', 'data')
+
+    def __init__(self, data):
+        self.data = data
+        self.id = data.get('id')
+        self.h = data.get('_h')
+        self.m = data.get('_m')
+        self.enabled = data.get('enabled', True)
+        self.days_mask = data.get('_days_mask', 0x7F)
+
+
 class Storage:
     def __init__(self, filename='data.json'):
         self.filename = filename
         self.data = {}
         self.load()
+        # Alarms live in memory after the first load; every mutation
+        # updates the cache in place and writes through, so the
+        # per-minute alarm check never touches flash or re-parses JSON
+        self._alarms_cache = None
+        self._next_alarm_id = 1
+        # Bumped on every alarm mutation so callers holding a local
+        # reference can tell whether their copy is stale without asking
+        self.alarms_version = 0
+        self._alarm_index = None
+        # Mutations only mark the cache dirty while flush_loop runs;
+        # the debounced flush collapses bursts of edits (e.g. from the
+        # web UI) into a single flash erase+write
+        self._dirty = False
+        self._flushing = False
+        # Optional hook so the app can clear per-alarm runtime state
+        # (e.g. trigger suppression) when an alarm goes away
+        self.on_alarm_deleted = None
+        self._settings_cache = None
+        # Settings counterpart of alarms_version: consumers memoizing
+        # derived forms (e.g. serialized JSON) key off it
+        self.settings_version = 0
+        # Last JSON string written per file; used to skip no-op saves
+        self._last_written = {}
+        # File sizes tracked as we write, so status queries never stat
+        self._file_sizes = {}
 
     def load(self):
         if os.path.exists(self.filename):
@@ -23,12 +66,172 @@ class Storage:
         self.data[key] = value
         self.save()
 
-    async def get_async(self, key):
-        # Simulating async operation with asyncio.sleep
-        import asyncio
-        await asyncio.sleep(0)  # Simulate async behavior
-        return self.get(key)
+    @staticmethod
+    def _recover(path):
+        # If a previous save got as far as the temp file but not the
+        # rename, adopt the temp copy instead of losing the data
+        tmp = path + '.tmp'
+        try:
+            os.stat(path)
+        except OSError:
+            try:
+                os.rename(tmp, path)
+            except OSError:
+                pass
+
+    def _write_json_atomic(self, path, obj):
+        # Encode once and write the buffer in a single call: json.dump
+        # streams many small writes, each a potential flash transaction.
+        # Skip the write entirely when the encoding matches what's
+        # already on flash.
+        data = json.dumps(obj)
+        if self._last_written.get(path) == data:
+            return
+        # Write the full document to a temp file and rename it over the
+        # target, so a reset mid-write can never leave truncated JSON
+        # where the real file used to be
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as file:
+            file.write(data)
+            file.flush()
+        if hasattr(os, 'sync'):
+            os.sync()
+        os.rename(tmp, path)
+        self._last_written[path] = data
+        self._file_sizes[path] = len(data)
+
+    def load_alarms(self):
+        if self._alarms_cache is None:
+            self._recover(config.ALARMS_FILE)
+            try:
+                with open(config.ALARMS_FILE, 'r') as file:
+                    self._alarms_cache = json.load(file)
+            except (OSError, ValueError):
+                self._alarms_cache = []
+            if self._alarms_cache:
+                # Computed once here; add_alarm tracks it incrementally
+                self._next_alarm_id = max(
+                    a['id'] for a in self._alarms_cache) + 1
+            for alarm in self._alarms_cache:
+                self._prepare_alarm(alarm)
+            self._build_alarm_index()
+        return self._alarms_cache
+
+    @staticmethod
+    def _prepare_alarm(alarm):
+        # Parse the HH:MM string once, at load/mutation time; the
+        # per-minute check then compares plain ints with no allocation.
+        # The string stays around for serialization to the web UI.
+        try:
+            hour, minute = alarm['time'].split(':')
+            alarm['_h'] = int(hour)
+            alarm['_m'] = int(minute)
+        except (KeyError, ValueError):
+            alarm['_h'] = alarm['_m'] = None
+        # 7-bit weekday mask; no days configured means every day
+        days = alarm.get('days')
+        alarm['_days_mask'] = sum(1 << d for d in days) if days else 0x7F
+
+    def _build_alarm_index(self):
+        # Parse times and expand recurrence once per mutation, so the
+        # minute tick is one dict lookup instead of a linear scan with
+        # string parsing per alarm
+        index = {}
+        for alarm in self._alarms_cache:
+            if alarm.get('_h') is None:
+                continue
+            obj = _Alarm(alarm)
+            for day in alarm.get('days') or range(7):
+                index.setdefault((obj.h, obj.m, day), []).append(obj)
+        self._alarm_index = index
+
+    def alarms_for(self, hour, minute, weekday):
+        # Returns _Alarm objects, not raw dicts
+        if self._alarm_index is None:
+            self.load_alarms()
+        return self._alarm_index.get((hour, minute, weekday), ())
+
+    def save_alarms(self, alarms):
+        self._alarms_cache = alarms
+        self.alarms_version += 1
+        self._build_alarm_index()
+        self._dirty = True
+        if not self._flushing:
+            # No flush task running: write through immediately as before
+            self._write_alarms()
+
+    def _write_alarms(self):
+        self._write_json_atomic(config.ALARMS_FILE, self._alarms_cache)
+        self._dirty = False
+
+    def get_storage_info(self):
+        # Serve cached sizes; os.stat of a missing file raises OSError,
+        # which allocates, so only fall back to it once per file
+        info = {}
+        for path in (config.ALARMS_FILE, config.SETTINGS_FILE):
+            size = self._file_sizes.get(path)
+            if size is None:
+                try:
+                    size = os.stat(path)[6]
+                except OSError:
+                    size = 0
+                self._file_sizes[path] = size
+            info[path] = size
+        return info
+
+    def load_settings(self):
+        if self._settings_cache is None:
+            self._recover(config.SETTINGS_FILE)
+            try:
+                with open(config.SETTINGS_FILE, 'r') as file:
+                    self._settings_cache = json.load(file)
+            except (OSError, ValueError):
+                self._settings_cache = {}
+        return self._settings_cache
+
+    def save_settings(self, settings):
+        self._settings_cache = settings
+        self.settings_version += 1
+        self._write_json_atomic(config.SETTINGS_FILE, settings)
+
+    async def flush_loop(self, interval=0.5):
+        self._flushing = True
+        try:
+            while True:
+                await asyncio.sleep(interval)
+                if self._dirty:
+                    self._write_alarms()
+        finally:
+            self._flushing = False
+            if self._dirty:
+                self._write_alarms()
+
+    def add_alarm(self, alarm):
+        alarms = self.load_alarms()
+        alarm['id'] = self._next_alarm_id
+        self._next_alarm_id += 1
+        self._prepare_alarm(alarm)
+        alarms.append(alarm)
+        self.save_alarms(alarms)
+        return alarm
+
+    def update_alarm(self, alarm_id, updates):
+        alarms = self.load_alarms()
+        for alarm in alarms:
+            if alarm['id'] == alarm_id:
+                alarm.update(updates)
+                self._prepare_alarm(alarm)
+                self.save_alarms(alarms)
+                return alarm
+        return None
 
-    async def set_async(self, key, value):
-        await asyncio.sleep(0)  # Simulate async behavior
-        self.set(key, value)
+    def delete_alarm(self, alarm_id):
+        alarms = self.load_alarms()
+        for i, alarm in enumerate(alarms):
+            if alarm['id'] == alarm_id:
+                alarms.pop(i)
+                self.save_alarms(alarms)
+                if self.on_alarm_deleted:
+                    self.on_alarm_deleted(alarm_id)
+                return True
+        return False
@@ -1,38 +1,418 @@
 import uasyncio as asyncio
 import ujson
-from machine import Pin
-
-class SimpleWebServer:
-    def __init__(self):
-        self.alarms = []
-        self.lights = []
-        self.settings = {}
-
-    async def handle_request(self, request):
-        # Simulated request handling logic
-        response = {'status': 'success'}
-        return ujson.dumps(response)
-
-    async def get_alarms(self):
-        return ujson.dumps(self.alarms)
-
-    async def add_alarm(self, alarm):
-        self.alarms.append(alarm)
-        return ujson.dumps({'status': 'alarm added'})
-
-    async def manage_lights(self, light_status):
-        self.lights.append(light_status)
-        return ujson.dumps({'status': 'lights updated'})
-
-    async def update_settings(self, new_settings):
-        self.settings.update(new_settings)
-        return ujson.dumps({'status': 'settings updated'})
-
-    async def serve(self):
-        while True:
-            # Simulate waiting for requests
-            await asyncio.sleep(1)
-
-# Usage
-# server = SimpleWebServer()
-# asyncio.run(server.serve())
\ No newline at end of file
+import os
+
+import config
+
+# UART prints are synchronous serial I/O, milliseconds each at 115200
+# baud; request logging only happens when config opts in
+DEBUG = getattr(config, 'DEBUG', False)
+
+# Response fragments are constant bytes, encoded once at import; the
+# builder joins them instead of growing a str and re-encoding per request
+_CRLF = b'\r\n'
+_HDR_CONN = b'Connection: close\r\n'
+_CT_JSON = b'Content-Type: application/json\r\n'
+_CT_HTML = b'Content-Type: text/html\r\n'
+_STATUS = {
+    200: b'HTTP/1.1 200 OK\r\n',
+    201: b'HTTP/1.1 201 Created\r\n',
+    400: b'HTTP/1.1 400 Bad Request\r\n',
+    404: b'HTTP/1.1 404 Not Found\r\n',
+    500: b'HTTP/1.1 500 Internal Server Error\r\n',
+}
+
+
+def _error_response(status_line, message):
+    # The recurring error replies never change: encode each one fully,
+    # headers and JSON body, at import so the handlers return a ready
+    # bytes constant instead of running ujson.dumps per failure
+    body = b'{"error": "' + message + b'"}'
+    return b''.join((status_line, _CT_JSON,
+                     b'Content-Length: ', str(len(body)).encode(), _CRLF,
+                     _HDR_CONN, _CRLF, body))
+
+
+_RESP_404 = _error_response(_STATUS[404], b'Not found')
+_RESP_404_ALARM = _error_response(_STATUS[404], b'Alarm not found')
+_RESP_400_BODY = _error_response(_STATUS[400], b'Request body required')
+_RESP_400_ALARM_ID = _error_response(_STATUS[400], b'Alarm ID required')
+_RESP_500_STORAGE = _error_response(_STATUS[500], b'Storage not available')
+_RESP_500_LIGHTS = _error_response(_STATUS[500], b'Lights not available')
+_RESP_500 = _error_response(_STATUS[500], b'Internal server error')
+
+
+class AsyncHTTPServer:
+    def __init__(self, host=config.WEB_SERVER_HOST, port=config.WEB_SERVER_PORT):
+        self.host = host
+        self.port = port
+        self.app = None
+        self.storage = None
+        self.leds = None
+        self.running = False
+        # Two fixed dict hops — method, then the 2nd path segment —
+        # resolve a handler. The API tree is shallow and fixed, so
+        # keying on the segment avoids building a "METHOD /path" key
+        # string per request just to feed one flat dict. The alarm id
+        # suffix is split off separately and stashed in the request
+        # dict for the handlers.
+        self._dispatch = {
+            'GET': {'': self._handle_index,
+                    'alarms': self._handle_no_storage,
+                    'lights': self._handle_get_lights,
+                    'settings': self._handle_no_storage},
+            'POST': {'alarms': self._handle_post_alarm,
+                     'lights': self._handle_post_lights},
+            'PATCH': {'alarms': self._handle_patch_alarm,
+                      'settings': self._handle_patch_settings},
+            'DELETE': {'alarms': self._handle_delete_alarm},
+        }
+
+        # index.html size is stat'ed once and remembered; a stat per hit
+        # is a flash access the Content-Length header doesn't need
+        self._index_size = None
+        # Pre-gzipped UI, built alongside index.html and loaded once at
+        # startup with its headers already joined on. Serving a
+        # gzip-capable client is a single write of cached bytes: no
+        # flash read and 3-5x fewer bytes on the wire.
+        try:
+            with open('index.html.gz', 'rb') as file:
+                blob = file.read()
+            self._index_gz_resp = b''.join((
+                _STATUS[200], _CT_HTML,
+                b'Content-Encoding: gzip\r\n',
+                b'Content-Length: ', str(len(blob)).encode(), _CRLF,
+                _HDR_CONN, _CRLF, blob))
+        except OSError:
+            self._index_gz_resp = None
+        # Prebuilt full HTTP responses (headers + body) for the hot GET
+        # endpoints; a cache hit is a single send with no handler call,
+        # no storage read and no json encode. Mutating handlers pop the
+        # affected key.
+        self._cache_resp = {}
+        self._cacheable = {'alarms', 'settings', 'lights'}
+        # Free-lists for the per-request scratch buffer and header dict:
+        # connections recycle them instead of allocating 2 KB + a dict
+        # per hit, which keeps gc.collect() pauses off the request path
+        self._buf_pool = []
+        self._hdr_pool = []
+        # Serialized alarms/settings memoized against the storage
+        # version counters, so polling clients only pay for ujson.dumps
+        # when the underlying data actually changed
+        self._json_cache = {}
+
+    def set_app(self, app):
+        self.app = app
+        # Dependencies are bound once here; handlers compare against
+        # None instead of paying a hasattr (a try/except getattr on
+        # MicroPython) on every request
+        self.storage = getattr(app, 'storage', None)
+        self.leds = getattr(app, 'led_controller', None)
+        if self.storage is not None:
+            # The storage-backed GETs share one coroutine body; each
+            # route binds its loader here instead of carrying a
+            # dedicated async method
+            get = self._dispatch['GET']
+            get['alarms'] = self._make_getter(
+                'alarms', self.storage.load_alarms, 'alarms_version')
+            get['settings'] = self._make_getter(
+                'settings', self.storage.load_settings, 'settings_version')
+
+    def _parse_request(self, data, headers=None, _bytes=bytes,
+                       _loads=ujson.loads):
+        # Scan the raw bytes once: a single find for the header/body
+        # split, then one split over the header block. The body bytes
+        # are handed to ujson.loads as-is, never decoded to str.
+        # Default args turn the module/builtin lookups into LOAD_FAST;
+        # on MicroPython a global is a dict probe per use.
+        if not isinstance(data, (bytes, bytearray)):
+            data = _bytes(data)
+        if headers is None:
+            headers = {}
+        else:
+            headers.clear()
+        hdr_end = data.find(b'\r\n\r\n')
+        if hdr_end < 0:
+            hdr_end = len(data)
+            body_bytes = b''
+        else:
+            body_bytes = data[hdr_end + 4:]
+        head = data[:hdr_end]
+        req_end = head.find(b'\r\n')
+        if req_end < 0:
+            req_end = len(head)
+        sp1 = head.find(b' ')
+        sp2 = head.find(b' ', sp1 + 1)
+        method = head[:sp1].decode('ascii')
+        path = head[sp1 + 1:sp2 if 0 <= sp2 < req_end else req_end].decode(
+            'ascii')
+        # splitlines does the line walk in C with no empty sentinels to
+        # skip, and partition scans each line for ':' exactly once.
+        # Names and values stay bytes; nothing downstream needs str.
+        for line in head[req_end + 2:].splitlines():
+            name, sep, value = line.partition(b':')
+            if sep:
+                headers[name.lower()] = value.strip()
+        request = {'method': method, 'path': path, 'headers': headers,
+                   'body': None}
+        if body_bytes:
+            try:
+                request['body'] = _loads(body_bytes)
+            except ValueError:
+                pass
+        return request
+
+    def _build_response(self, status, body, content_type=_CT_JSON):
+        # Headers and body stay separate buffers; the caller writes them
+        # back to back and drains once, so the body is never copied into
+        # a joined response and peak RAM stays at len(body), not double
+        if isinstance(body, bytes):
+            body_bytes = body
+        elif isinstance(body, str):
+            body_bytes = body.encode('utf-8')
+        else:
+            body_bytes = ujson.dumps(body).encode('utf-8')
+        head = b''.join((
+            _STATUS.get(status) or _STATUS[500],
+            content_type,
+            b'Content-Length: ', str(len(body_bytes)).encode(), _CRLF,
+            _HDR_CONN,
+            _CRLF,
+        ))
+        return head, body_bytes
+
+    async def _handle_stream(self, reader, writer, _bytes=bytes,
+                             _int=int, _memoryview=memoryview):
+        # Recycled scratch state: pop from the free-lists (or allocate
+        # on first use / under concurrency) and return them when done
+        buf = self._buf_pool.pop() if self._buf_pool else bytearray(2048)
+        headers = self._hdr_pool.pop() if self._hdr_pool else {}
+        try:
+            # Read into one preallocated buffer: repeated b'' += chunk
+            # reallocates and copies the whole request every iteration,
+            # O(n^2) bytes moved on a fragmenting heap
+            mv = _memoryview(buf)
+            off = 0
+            header_end = -1
+            target = -1
+            needs_body = True
+            while off < len(buf):
+                n = await reader.readinto(mv[off:])
+                if not n:
+                    break
+                prev = off
+                off += n
+                if prev == 0:
+                    # GET/DELETE carry no body: the loop can stop at the
+                    # end of headers without ever looking for
+                    # Content-Length or waiting on body bytes
+                    prefix = _bytes(mv[:4])
+                    needs_body = (prefix != b'GET '
+                                  and prefix != b'DELE')
+                if header_end < 0:
+                    # Scan only the newly arrived tail (minus 3 bytes of
+                    # overlap) for the blank line, not the whole buffer
+                    header_end = buf.find(b'\r\n\r\n',
+                                          prev - 3 if prev > 3 else 0, off)
+                    if header_end >= 0:
+                        if not needs_body:
+                            break
+                        # Content-Length is located once, on header
+                        # completion, with a single find over a lowered
+                        # copy of the header slice — no per-line loop
+                        content_length = 0
+                        head = _bytes(mv[:header_end]).lower()
+                        p = head.find(b'content-length:')
+                        if p >= 0:
+                            e = head.find(b'\r\n', p)
+                            if e < 0:
+                                e = header_end
+                            content_length = _int(head[p + 15:e])
+                        target = header_end + 4 + content_length
+                if 0 <= target <= off:
+                    break
+            if not off:
+                return
+            request = self._parse_request(mv[:off], headers)
+            method = request['method']
+            path = request['path']
+            # One split resolves both the dispatch segment and the
+            # /api/alarms/<id> suffix; the handlers read
+            # request['alarm_id'] instead of re-splitting the path
+            parts = path.split('/', 3)
+            seg = parts[2] if len(parts) > 2 else ''
+            if len(parts) > 3 and parts[3]:
+                # Id suffix: slice after the last '/' — no further split
+                # or list; a malformed id is rejected right here with
+                # the prebuilt 400 instead of reaching a handler
+                try:
+                    request['alarm_id'] = _int(path[path.rfind('/') + 1:])
+                except ValueError:
+                    writer.write(_RESP_400_ALARM_ID)
+                    await writer.drain()
+                    return
+            cache_key = seg if (method == 'GET'
+                                and seg in self._cacheable) else None
+            if cache_key is not None:
+                cached = self._cache_resp.get(cache_key)
+                if cached is not None:
+                    writer.write(cached[0])
+                    writer.write(cached[1])
+                    await writer.drain()
+                    return
+            handler = self._dispatch.get(method, {}).get(seg)
+            result = await handler(request) if handler else _RESP_404
+            if isinstance(result, bytes):
+                # Prebuilt response constant: send as-is
+                writer.write(result)
+                await writer.drain()
+                return
+            status, body, content_type = result
+            if status == 'stream':
+                # File responses go out in fixed chunks straight from
+                # flash; nothing handler-sized is ever held in RAM
+                await self._send_file(writer, body, content_type)
+                return
+            head, body_bytes = self._build_response(
+                status, body, content_type or _CT_JSON)
+            if cache_key is not None and status == 200:
+                self._cache_resp[cache_key] = (head, body_bytes)
+            writer.write(head)
+            writer.write(body_bytes)
+            await writer.drain()
+        except Exception as e:
+            if DEBUG:
+                print('Request failed:', e)
+            try:
+                # Fixed bytes: no str(e) repr work or json encode while
+                # the server is already in trouble
+                writer.write(_RESP_500)
+                await writer.drain()
+            except OSError:
+                pass
+        finally:
+            self._buf_pool.append(buf)
+            headers.clear()
+            self._hdr_pool.append(headers)
+            writer.close()
+            await writer.wait_closed()
+
+    async def _send_file(self, writer, path, content_type):
+        size = self._index_size
+        if size is None:
+            size = os.stat(path)[6]
+            self._index_size = size
+        writer.write(b''.join((
+            _STATUS[200], content_type,
+            b'Content-Length: ', str(size).encode(), _CRLF,
+            _HDR_CONN, _CRLF)))
+        buf = bytearray(512)
+        mv = memoryview(buf)
+        with open(path, 'rb') as file:
+            while True:
+                n = file.readinto(buf)
+                if not n:
+                    break
+                writer.write(mv[:n])
+                await writer.drain()
+
+    async def _handle_index(self, request):
+        if (self._index_gz_resp is not None and b'gzip' in
+                request['headers'].get(b'accept-encoding', b'')):
+            return self._index_gz_resp
+        # Sentinel status: _handle_stream streams the file itself
+        # instead of buffering the whole document through
+        # _build_response (headers + str + utf-8 copy, 3x the file size)
+        return 'stream', 'index.html', _CT_HTML
+
+    def _dumps_versioned(self, key, gen, obj):
+        cached = self._json_cache.get(key)
+        if cached is not None and cached[0] == gen:
+            return cached[1]
+        body = ujson.dumps(obj).encode('utf-8')
+        self._json_cache[key] = (gen, body)
+        return body
+
+    async def _handle_no_storage(self, request):
+        return _RESP_500_STORAGE
+
+    def _make_getter(self, key, loader, version_attr):
+        # Factory for the one-liner JSON GETs: a closure per route
+        # replaces a full async method's bytecode, and every route goes
+        # through the same version-keyed dumps memoization
+        async def getter(request):
+            return 200, self._dumps_versioned(
+                key, getattr(self.storage, version_attr), loader()), None
+        return getter
+
+    async def _handle_post_alarm(self, request):
+        if self.storage is None:
+            return _RESP_500_STORAGE
+        if not request['body']:
+            return _RESP_400_BODY
+        alarm = self.storage.add_alarm(request['body'])
+        self._cache_resp.pop('alarms', None)
+        return 201, alarm, None
+
+    async def _handle_patch_alarm(self, request):
+        if self.storage is None:
+            return _RESP_500_STORAGE
+        if request.get('alarm_id') is None:
+            return _RESP_400_ALARM_ID
+        if not request['body']:
+            return _RESP_400_BODY
+        alarm = self.storage.update_alarm(request['alarm_id'],
+                                              request['body'])
+        if alarm is None:
+            return _RESP_404_ALARM
+        self._cache_resp.pop('alarms', None)
+        return 200, alarm, None
+
+    async def _handle_delete_alarm(self, request):
+        if self.storage is None:
+            return _RESP_500_STORAGE
+        if request.get('alarm_id') is None:
+            return _RESP_400_ALARM_ID
+        if not self.storage.delete_alarm(request['alarm_id']):
+            return _RESP_404_ALARM
+        self._cache_resp.pop('alarms', None)
+        return 200, {'status': 'deleted'}, None
+
+    async def _handle_get_lights(self, request):
+        if self.leds is None:
+            return _RESP_500_LIGHTS
+        return 200, {'color': self.leds.current_color}, None
+
+    async def _handle_post_lights(self, request):
+        if self.leds is None:
+            return _RESP_500_LIGHTS
+        if not request['body']:
+            return _RESP_400_BODY
+        body = request['body']
+        self.leds.set_cct_brightness(
+            body.get('temperature', 50), body.get('brightness', 100))
+        self._cache_resp.pop('lights', None)
+        return 200, {'status': 'lights updated'}, None
+
+    async def _handle_patch_settings(self, request):
+        if self.storage is None:
+            return _RESP_500_STORAGE
+        if not request['body']:
+            return _RESP_400_BODY
+        settings = self.storage.load_settings()
+        settings.update(request['body'])
+        self.storage.save_settings(settings)
+        self._cache_resp.pop('settings', None)
+        return 200, settings, None
+
+    async def start(self):
+        # start_server parks the listening socket on the event loop's
+        # selector, so a connection wakes the handler immediately; the
+        # old accept() poll added up to 100 ms of latency per request
+        # and a wakeup every cycle while idle
+        self.running = True
+        self._server = await asyncio.start_server(
+            self._handle_stream, self.host, self.port)
+        print('Web server listening on', (self.host, self.port))
+        await self._server.wait_closed()
+